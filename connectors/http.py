@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+def _build_session() -> requests.Session:
+    """Shared keep-alive session so repeated API calls reuse TCP+TLS connections."""
+    session = requests.Session()
+    retry = Retry(
+        total=3,
+        backoff_factor=0.2,
+        status_forcelist=[429, 502, 503, 504],
+        raise_on_status=False,  # hand the final response back to the caller's status checks
+    )
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry))
+    session.headers["Accept-Encoding"] = "gzip, deflate"
+    return session
+
+
+SESSION = _build_session()
@@ -1,17 +1,34 @@
 #!/usr/bin/env python3
 
 import logging
-from typing import List, Set
+from typing import Dict, Iterator, List, Set
 
-import requests
+try:
+    import ijson
+except ImportError:  # optional: without it the feed is parsed in one piece
+    ijson = None
 
 from connectors.base import NormalizedVulnerability, ThreatIntelProvider
+from connectors.http import SESSION
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_KEV_URL = "https://www.cisa.gov/sites/default/files/feeds/known_exploited_vulnerabilities.json"
 
 
+def iter_kev_entries(response) -> Iterator[Dict]:
+    """Yield KEV catalog entries from a ``stream=True`` response.
+
+    With ijson installed the body is parsed incrementally straight off the
+    socket, so the JSON document is never materialized as one object.
+    """
+    if ijson is None:
+        yield from response.json().get("vulnerabilities", [])
+        return
+    response.raw.decode_content = True
+    yield from ijson.items(response.raw, "vulnerabilities.item")
+
+
 class CISAKEVProvider(ThreatIntelProvider):
     def __init__(self, api_url: str = DEFAULT_KEV_URL, cache_db=None,
                  cache_max_age_days: int = 1, timeout: int = 10):
@@ -43,26 +60,39 @@ class CISAKEVProvider(ThreatIntelProvider):
 
         # Check cache
         if self.cache_db:
-            cached = self.cache_db.get_all_cisa_kev_cves(max_age_days=self.cache_max_age_days)
+            if hasattr(self.cache_db, "load_kev_snapshot"):
+                cached = self.cache_db.load_kev_snapshot(max_age_days=self.cache_max_age_days)
+            else:
+                cached = self.cache_db.get_all_cisa_kev_cves(max_age_days=self.cache_max_age_days)
             if cached:
                 self._kev_set = cached
                 return self._kev_set
 
-        # Fetch from API
+        # Fetch from API, conditionally if the cache remembers the last feed version
+        headers = {"User-Agent": "VulnPrioritizer/2.0"}
+        if self.cache_db and hasattr(self.cache_db, "get_kev_conditional_headers"):
+            headers.update(self.cache_db.get_kev_conditional_headers())
         try:
-            response = requests.get(
+            with SESSION.get(
                 self.api_url,
-                headers={"User-Agent": "VulnPrioritizer/2.0"},
+                headers=headers,
                 timeout=self.timeout,
-            )
-            if response.status_code == 200:
-                data = response.json()
-                for vuln in data.get("vulnerabilities", []):
-                    cve_id = vuln.get("cveID", "")
-                    if cve_id:
-                        self._kev_set.add(cve_id)
-                        if self.cache_db and hasattr(self.cache_db, "cache_cisa_kev"):
-                            self.cache_db.cache_cisa_kev(
+                stream=True,
+            ) as response:
+                if response.status_code == 304 and self.cache_db:
+                    if hasattr(self.cache_db, "refresh_cisa_kev_cache"):
+                        self.cache_db.refresh_cisa_kev_cache()
+                    self._kev_set = self.cache_db.get_all_cisa_kev_cves(
+                        max_age_days=self.cache_max_age_days) or set()
+                    logger.info("CISA KEV not modified, reusing %d cached CVEs", len(self._kev_set))
+                elif response.status_code == 200:
+                    kev_set = set()
+                    kev_rows = []
+                    for vuln in iter_kev_entries(response):
+                        cve_id = vuln.get("cveID", "")
+                        if cve_id:
+                            kev_set.add(cve_id)
+                            kev_rows.append((
                                 cve_id,
                                 vuln.get("vendorProject", ""),
                                 vuln.get("product", ""),
@@ -71,11 +101,29 @@ class CISAKEVProvider(ThreatIntelProvider):
                                 vuln.get("shortDescription", ""),
                                 vuln.get("requiredAction", ""),
                                 vuln.get("dueDate", ""),
-                            )
-                logger.info("Loaded %d CVEs from CISA KEV", len(self._kev_set))
-            else:
-                logger.warning("Failed to fetch CISA KEV: %d", response.status_code)
+                            ))
+                    # Cache only a complete feed, and only once it is off the wire,
+                    # so no write transaction is held open across the download
+                    self._cache_rows(kev_rows)
+                    self._kev_set = kev_set
+                    if self.cache_db and hasattr(self.cache_db, "set_kev_validators"):
+                        self.cache_db.set_kev_validators(response.headers.get("ETag"),
+                                                         response.headers.get("Last-Modified"))
+                    logger.info("Loaded %d CVEs from CISA KEV", len(self._kev_set))
+                else:
+                    logger.warning("Failed to fetch CISA KEV: %d", response.status_code)
         except Exception as e:
             logger.warning("Error fetching CISA KEV: %s", e)
+            # Never hand back (or keep) a catalog cut short by a failed stream
+            self._kev_set = set()
 
         return self._kev_set
+
+    def _cache_rows(self, kev_rows: List[tuple]):
+        if not self.cache_db or not kev_rows:
+            return
+        if hasattr(self.cache_db, "cache_cisa_kev_bulk"):
+            self.cache_db.cache_cisa_kev_bulk(kev_rows)
+        elif hasattr(self.cache_db, "cache_cisa_kev"):
+            for row in kev_rows:
+                self.cache_db.cache_cisa_kev(*row)
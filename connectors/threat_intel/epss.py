@@ -2,28 +2,31 @@
 
 import logging
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, List, Optional
 
-import requests
-
 from connectors.base import NormalizedVulnerability, ThreatIntelProvider
+from connectors.http import SESSION
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_EPSS_API = "https://api.first.org/data/v1/epss"
-DEFAULT_BATCH_SIZE = 50
+DEFAULT_BATCH_SIZE = 150  # keeps the ?cve= query string near 2KB
 DEFAULT_RATE_LIMIT_DELAY = 1.0
+DEFAULT_MAX_WORKERS = 4
 
 
 class EPSSProvider(ThreatIntelProvider):
     def __init__(self, api_url: str = DEFAULT_EPSS_API, cache_db=None,
                  cache_max_age_days: int = 7, timeout: int = 10,
-                 rate_limit_delay: float = DEFAULT_RATE_LIMIT_DELAY):
+                 rate_limit_delay: float = DEFAULT_RATE_LIMIT_DELAY,
+                 max_workers: int = DEFAULT_MAX_WORKERS):
         self.api_url = api_url
         self.cache_db = cache_db
         self.cache_max_age_days = cache_max_age_days
         self.timeout = timeout
         self.rate_limit_delay = rate_limit_delay
+        self.max_workers = max_workers
 
     def provider_name(self) -> str:
         return "EPSS"
@@ -50,31 +53,54 @@ class EPSSProvider(ThreatIntelProvider):
 
         # Check cache first
         if self.cache_db:
-            for cve in cve_ids:
-                cached = self.cache_db.get_epss_score(cve, max_age_days=self.cache_max_age_days)
-                if cached:
-                    epss_data[cve] = {"epss": cached.get("score", cached.get("epss", 0.0)),
-                                      "percentile": cached.get("percentile", 0.0)}
-                else:
-                    uncached.append(cve)
+            if hasattr(self.cache_db, "get_epss_scores_bulk"):
+                # Bulk rows are (epss, percentile, model_version, score_date)
+                cached_scores = self.cache_db.get_epss_scores_bulk(
+                    cve_ids, max_age_days=self.cache_max_age_days)
+                for cve in cve_ids:
+                    cached = cached_scores.get(cve)
+                    if cached:
+                        epss_data[cve] = {"epss": cached[0], "percentile": cached[1]}
+                    else:
+                        uncached.append(cve)
+            else:
+                for cve in cve_ids:
+                    cached = self.cache_db.get_epss_score(cve, max_age_days=self.cache_max_age_days)
+                    if cached:
+                        epss_data[cve] = {"epss": cached.get("score", cached.get("epss", 0.0)),
+                                          "percentile": cached.get("percentile", 0.0)}
+                    else:
+                        uncached.append(cve)
         else:
             uncached = list(cve_ids)
 
         if not uncached:
             return epss_data
 
-        # Fetch from API in batches
-        for i in range(0, len(uncached), DEFAULT_BATCH_SIZE):
-            batch = uncached[i:i + DEFAULT_BATCH_SIZE]
-            self._fetch_batch(batch, epss_data)
-            if i + DEFAULT_BATCH_SIZE < len(uncached):
-                time.sleep(self.rate_limit_delay)
+        # Fetch from API in concurrent batches; results are cached from this
+        # thread only, so the cache connection never sees a second writer.
+        batches = [uncached[i:i + DEFAULT_BATCH_SIZE] for i in range(0, len(uncached), DEFAULT_BATCH_SIZE)]
+        max_workers = min(self.max_workers, len(batches))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                # A worker's first request goes out at once, later ones keep the delay
+                executor.submit(self._fetch_batch, batch,
+                                self.rate_limit_delay if i >= max_workers else 0.0)
+                for i, batch in enumerate(batches)
+            ]
+            for future in as_completed(futures):
+                rows = future.result()
+                for row in rows:
+                    epss_data[row["cve_id"]] = {"epss": row["epss"], "percentile": row["percentile"]}
+                self._cache_rows(rows)
 
         return epss_data
 
-    def _fetch_batch(self, cve_batch: List[str], epss_data: Dict):
+    def _fetch_batch(self, cve_batch: List[str], delay: float = 0.0) -> List[Dict]:
+        time.sleep(delay)
+        rows = []
         try:
-            response = requests.get(
+            response = SESSION.get(
                 self.api_url,
                 params={"cve": ",".join(cve_batch)},
                 headers={"User-Agent": "VulnPrioritizer/2.0", "Accept": "application/json"},
@@ -85,19 +111,27 @@ class EPSSProvider(ThreatIntelProvider):
                 for item in data.get("data", []):
                     cve = item.get("cve", "")
                     if cve:
-                        epss_data[cve] = {
+                        rows.append({
+                            "cve_id": cve,
                             "epss": float(item.get("epss", 0)),
                             "percentile": float(item.get("percentile", 0)),
-                        }
-                        if self.cache_db and hasattr(self.cache_db, "cache_epss_score"):
-                            self.cache_db.cache_epss_score(
-                                cve,
-                                epss_data[cve]["epss"],
-                                epss_data[cve]["percentile"],
-                                data.get("model_version", ""),
-                                data.get("score_date", ""),
-                            )
+                            "model_version": data.get("model_version", ""),
+                            "score_date": data.get("score_date", ""),
+                        })
             else:
                 logger.warning("EPSS API returned status %d", response.status_code)
         except Exception as e:
             logger.warning("Error fetching EPSS batch: %s", e)
+        return rows
+
+    def _cache_rows(self, rows: List[Dict]):
+        if not self.cache_db or not rows:
+            return
+        if hasattr(self.cache_db, "cache_epss_scores_bulk"):
+            self.cache_db.cache_epss_scores_bulk(rows)
+        elif hasattr(self.cache_db, "cache_epss_score"):
+            for row in rows:
+                self.cache_db.cache_epss_score(
+                    row["cve_id"], row["epss"], row["percentile"],
+                    row["model_version"], row["score_date"],
+                )
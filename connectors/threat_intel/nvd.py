@@ -4,10 +4,9 @@ import logging
 import time
 from typing import List, Optional
 
-import requests
-
 from cache.store import FeedCache
 from connectors.base import NormalizedVulnerability, ThreatIntelProvider
+from connectors.http import SESSION
 
 logger = logging.getLogger(__name__)
 
@@ -92,7 +91,7 @@ class NVDProvider(ThreatIntelProvider):
     def _fetch_single(self, cve_id: str) -> Optional[dict]:
         self._respect_rate_limit()
         try:
-            response = requests.get(
+            response = SESSION.get(
                 NVD_API_URL,
                 params={"cveId": cve_id},
                 headers={"User-Agent": "VulnPrioritizer/2.0"},
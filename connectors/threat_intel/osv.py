@@ -3,9 +3,8 @@
 import logging
 from typing import Dict, List, Optional
 
-import requests
-
 from connectors.base import NormalizedVulnerability, ThreatIntelProvider
+from connectors.http import SESSION
 
 logger = logging.getLogger(__name__)
 
@@ -55,7 +54,7 @@ class OSVProvider(ThreatIntelProvider):
             queries = [{"vulnerability": {"id": cve_id}} for cve_id in batch]
 
             try:
-                response = requests.post(
+                response = SESSION.post(
                     OSV_BATCH_API,
                     json={"queries": queries},
                     headers={"Content-Type": "application/json"},
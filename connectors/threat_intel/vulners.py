@@ -3,9 +3,8 @@
 import logging
 from typing import Dict, List, Optional
 
-import requests
-
 from connectors.base import NormalizedVulnerability, ThreatIntelProvider
+from connectors.http import SESSION
 
 logger = logging.getLogger(__name__)
 
@@ -56,7 +55,7 @@ class VulnersProvider(ThreatIntelProvider):
                 if self.api_key:
                     payload["apiKey"] = self.api_key
 
-                response = requests.post(
+                response = SESSION.post(
                     VULNERS_API_URL,
                     json=payload,
                     headers={"Content-Type": "application/json"},
@@ -1,131 +1,366 @@
 #!/usr/bin/env python3
 import sqlite3
 import json
-from datetime import datetime, timedelta
-from typing import Dict, Optional, List
+import time
+from datetime import datetime
+from typing import Dict, FrozenSet, Optional, List, Tuple
 import os
+import queue
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+DB_VERSION = '1.2'
+
+# Both cache tables are always looked up by cve_id, so they are stored
+# WITHOUT ROWID to drop the rowid -> row indirection. Cache timestamps are
+# INTEGER unix seconds so expiry checks are plain integer comparisons.
+_CREATE_EPSS_CACHE = '''
+    CREATE TABLE IF NOT EXISTS epss_cache (
+        cve_id TEXT PRIMARY KEY,
+        epss_score REAL,
+        percentile REAL,
+        model_version TEXT,
+        score_date TEXT,
+        cached_at INTEGER,
+        last_accessed INTEGER
+    ) WITHOUT ROWID
+'''
+
+_CREATE_KEV_CACHE = '''
+    CREATE TABLE IF NOT EXISTS cisa_kev_cache (
+        cve_id TEXT PRIMARY KEY,
+        vendor_project TEXT,
+        product TEXT,
+        vulnerability_name TEXT,
+        date_added TEXT,
+        short_description TEXT,
+        required_action TEXT,
+        due_date TEXT,
+        cached_at INTEGER,
+        last_accessed INTEGER
+    ) WITHOUT ROWID
+'''
+
+_CREATE_API_CALL_LOG = '''
+    CREATE TABLE IF NOT EXISTS api_call_log (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        api_type TEXT,
+        endpoint TEXT,
+        parameters TEXT,
+        status_code INTEGER,
+        response_time REAL,
+        cached BOOLEAN,
+        timestamp INTEGER
+    )
+'''
+
+_CREATE_METADATA = '''
+    CREATE TABLE IF NOT EXISTS metadata (
+        key TEXT PRIMARY KEY,
+        value TEXT,
+        updated_at INTEGER
+    )
+'''
+
+# Columns holding ISO-8601 strings before schema 1.2
+_TIMESTAMP_COLUMNS = ('cached_at', 'last_accessed', 'timestamp', 'updated_at')
+
+# Hot-path statements are kept as module constants so every call passes the
+# same string and hits the connection's prepared-statement cache.
+_SQL_SET_METADATA = '''
+    INSERT OR REPLACE INTO metadata (key, value, updated_at)
+    VALUES (?, ?, ?)
+'''
+
+_SQL_GET_METADATA = 'SELECT value FROM metadata WHERE key = ?'
+
+_SQL_INSERT_EPSS = '''
+    INSERT OR REPLACE INTO epss_cache 
+    (cve_id, epss_score, percentile, model_version, score_date, cached_at, last_accessed)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+
+_SQL_SELECT_EPSS = '''
+    SELECT epss_score, percentile, model_version, score_date, cached_at 
+    FROM epss_cache 
+    WHERE cve_id = ?
+'''
+
+_SQL_SELECT_EPSS_PAIR = '''
+    SELECT epss_score, percentile
+    FROM epss_cache
+    WHERE cve_id = ? AND cached_at > ?
+'''
+
+# Full chunks always format to the same string, so they share one cached statement
+_SQL_SELECT_EPSS_IN = '''
+    SELECT cve_id, epss_score, percentile, model_version, score_date
+    FROM epss_cache
+    WHERE cve_id IN ({placeholders}) AND cached_at > ?
+'''
+
+_SQL_INSERT_KEV = '''
+    INSERT OR REPLACE INTO cisa_kev_cache 
+    (cve_id, vendor_project, product, vulnerability_name, date_added,
+     short_description, required_action, due_date, cached_at, last_accessed)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# Primary-key seek on cve_id; cached_at is read from the same WITHOUT ROWID
+# row, so a row comes back only if the entry is still fresh
+_SQL_SELECT_KEV = 'SELECT 1 FROM cisa_kev_cache WHERE cve_id = ? AND cached_at > ? LIMIT 1'
+
+_SQL_SELECT_KEV_SINCE = 'SELECT cve_id FROM cisa_kev_cache WHERE cached_at > ?'
+
+_SQL_ANY_KEV = 'SELECT 1 FROM cisa_kev_cache LIMIT 1'
+
+_SQL_REFRESH_KEV = 'UPDATE cisa_kev_cache SET cached_at = ?'
+
+_SQL_INSERT_API_CALL = '''
+    INSERT INTO api_call_log 
+    (api_type, endpoint, parameters, status_code, response_time, cached, timestamp)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+
+_SQL_CACHE_COUNTS = '''
+    SELECT (SELECT COUNT(*) FROM epss_cache),
+           (SELECT COUNT(*) FROM cisa_kev_cache),
+           (SELECT COUNT(*) FROM api_call_log),
+           (SELECT COUNT(*) FROM api_call_log WHERE cached = 1)
+'''
+
+# Range scan on idx_api_log_ts_type
+_SQL_RECENT_CALLS_BY_TYPE = '''
+    SELECT api_type, COUNT(*) 
+    FROM api_call_log 
+    WHERE timestamp > ?
+    GROUP BY api_type
+'''
+
+_SQL_TOUCH = {
+    'epss_cache': 'UPDATE epss_cache SET last_accessed = ? WHERE cve_id = ?',
+    'cisa_kev_cache': 'UPDATE cisa_kev_cache SET last_accessed = ? WHERE cve_id = ?',
+}
+
+_SECONDS_PER_DAY = 86400
+
+
+def _now_int() -> int:
+    """Current unix time in whole seconds, as stored in timestamp columns"""
+    return time.time_ns() // 1_000_000_000
 
 
 class EPSSCacheDB:
-    def __init__(self, db_path: str = "epss_cache.db"):
+    # sqlite3 prepared-statement cache size (default 128)
+    CACHED_STATEMENTS = 256
+    # Applied on every connection open. WAL + NORMAL sync keeps the many small
+    # single-row commits cheap and lets readers proceed during bulk ingest.
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA busy_timeout=5000",
+        "PRAGMA cache_size=-20000",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA mmap_size=268435456",
+    )
+    # Read-only connections inherit the journal mode from the writer
+    READER_PRAGMAS = PRAGMAS[2:]
+    # Idle reader connections kept for reuse; extras are closed on release
+    READER_POOL_SIZE = 4
+    # Buffered last_accessed updates are written once this many hits pile up
+    TOUCH_FLUSH_THRESHOLD = 500
+    # Seconds an in-memory KEV snapshot is reused before re-querying
+    KEV_SNAPSHOT_TTL = 300
+    # CVEs per IN (...) lookup, well under SQLite's bound-parameter limit
+    BULK_SELECT_CHUNK = 500
+    # Rows per executemany call when bulk-loading the KEV catalog
+    BULK_WRITE_CHUNK = 500
+    # Buffered api_call_log rows are written once this many calls pile up
+    API_LOG_FLUSH_THRESHOLD = 256
+    # Bulk-inserted rows between passive WAL checkpoints
+    CHECKPOINT_INTERVAL_ROWS = 5000
+    # busy_timeout (ms) while closing; shutdown gives up on a locked database
+    CLOSE_BUSY_TIMEOUT_MS = 200
+
+    def __init__(self, db_path: str = "epss_cache.db", log_api_calls: bool = True):
         """Initialize the cache database"""
         self.db_path = db_path
-        self.conn = None
-        self.cursor = None
+        self.log_api_calls = log_api_calls
+        self._api_log_buffer: List[tuple] = []
+        self._writer_conn = None
+        self._writer_lock = threading.Lock()
+        # Guards the touch / api-log buffers and the checkpoint counter
+        self._buffer_lock = threading.Lock()
+        self._reader_pool: "queue.Queue[sqlite3.Connection]" = queue.Queue(self.READER_POOL_SIZE)
+        self._touch_buffer: Dict[str, List[str]] = {'epss_cache': [], 'cisa_kev_cache': []}
+        self._touch_count = 0
+        self._rows_since_checkpoint = 0
+        self._kev_snapshot = None
         self._init_database()
     
     def _init_database(self):
         """Create database tables if they don't exist"""
-        self.conn = sqlite3.connect(self.db_path)
-        self.cursor = self.conn.cursor()
-        
-        # EPSS scores cache table
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS epss_cache (
-                cve_id TEXT PRIMARY KEY,
-                epss_score REAL,
-                percentile REAL,
-                model_version TEXT,
-                score_date TEXT,
-                cached_at TEXT,
-                last_accessed TEXT
-            )
-        ''')
-        
-        # CISA KEV cache table
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS cisa_kev_cache (
-                cve_id TEXT PRIMARY KEY,
-                vendor_project TEXT,
-                product TEXT,
-                vulnerability_name TEXT,
-                date_added TEXT,
-                short_description TEXT,
-                required_action TEXT,
-                due_date TEXT,
-                cached_at TEXT,
-                last_accessed TEXT
-            )
-        ''')
+        # isolation_level=None: transactions are controlled explicitly
+        self._writer_conn = sqlite3.connect(self.db_path, isolation_level=None,
+                                            check_same_thread=False,
+                                            cached_statements=self.CACHED_STATEMENTS)
+        for pragma in self.PRAGMAS:
+            self._writer_conn.execute(pragma)
         
-        # API call log table
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS api_call_log (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                api_type TEXT,
-                endpoint TEXT,
-                parameters TEXT,
-                status_code INTEGER,
-                response_time REAL,
-                cached BOOLEAN,
-                timestamp TEXT
-            )
-        ''')
+        with self._write_transaction() as cur:
+            # CVE-keyed cache tables
+            cur.execute(_CREATE_EPSS_CACHE)
+            cur.execute(_CREATE_KEV_CACHE)
+            
+            # API call log table
+            cur.execute(_CREATE_API_CALL_LOG)
+            
+            # Metadata table for tracking database info
+            cur.execute(_CREATE_METADATA)
         
-        # Metadata table for tracking database info
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS metadata (
-                key TEXT PRIMARY KEY,
-                value TEXT,
-                updated_at TEXT
-            )
-        ''')
+        if self._get_metadata('db_version') in ('1.0', '1.1'):
+            self._migrate_schema()
         
-        self.conn.commit()
+        with self._write_transaction() as cur:
+            # Indexes for expiry sweeps, KEV snapshots and the 24h API stats
+            cur.execute('CREATE INDEX IF NOT EXISTS idx_epss_cached_at ON epss_cache(cached_at)')
+            cur.execute('CREATE INDEX IF NOT EXISTS idx_kev_cached_at ON cisa_kev_cache(cached_at)')
+            # The WITHOUT ROWID primary key already carries cached_at, so this
+            # older (cve_id, cached_at) index was never chosen; drop it wherever
+            # a previous schema left it behind
+            cur.execute('DROP INDEX IF EXISTS idx_kev_cveid_cached')
+            cur.execute('CREATE INDEX IF NOT EXISTS idx_api_log_ts_type ON api_call_log(timestamp, api_type)')
         
         # Set database version
-        self._set_metadata('db_version', '1.0')
+        self._set_metadata('db_version', DB_VERSION)
         self._set_metadata('created_at', datetime.now().isoformat())
     
+    @contextmanager
+    def _write_transaction(self):
+        """Run the enclosed writes in one BEGIN IMMEDIATE transaction.
+
+        Only one writer is active at a time. Taking the write lock up front
+        avoids SQLITE_BUSY from a deferred transaction upgrading mid-way;
+        busy_timeout covers the wait.
+        """
+        with self._writer_lock:
+            cur = self._writer_conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                yield cur
+            except BaseException:
+                # SQLite may already have rolled back itself (e.g. SQLITE_FULL);
+                # a second ROLLBACK would then mask the original error
+                if self._writer_conn.in_transaction:
+                    cur.execute("ROLLBACK")
+                raise
+            cur.execute("COMMIT")
+    
+    def _open_reader(self) -> sqlite3.Connection:
+        """Open a read-only connection to the database file"""
+        uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, isolation_level=None,
+                               check_same_thread=False,
+                               cached_statements=self.CACHED_STATEMENTS)
+        for pragma in self.READER_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    
+    @contextmanager
+    def _reader(self):
+        """Borrow a pooled read-only cursor; under WAL it never waits on the writer"""
+        if self.db_path == ':memory:':
+            # A private in-memory database is only reachable via the writer
+            with self._writer_lock:
+                yield self._writer_conn.cursor()
+            return
+        try:
+            conn = self._reader_pool.get_nowait()
+        except queue.Empty:
+            conn = self._open_reader()
+        try:
+            yield conn.cursor()
+        finally:
+            try:
+                self._reader_pool.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+    
+    def _migrate_schema(self):
+        """Rebuild pre-1.2 tables: WITHOUT ROWID cache tables, INTEGER timestamps"""
+        with self._write_transaction() as cur:
+            for table, ddl in (('epss_cache', _CREATE_EPSS_CACHE),
+                               ('cisa_kev_cache', _CREATE_KEV_CACHE),
+                               ('api_call_log', _CREATE_API_CALL_LOG),
+                               ('metadata', _CREATE_METADATA)):
+                cur.execute(f'PRAGMA table_info({table})')
+                columns = [row[1] for row in cur.fetchall()]
+                # Old values are local-time isoformat() strings
+                select = ', '.join(
+                    f"CASE WHEN typeof({col}) = 'text' "
+                    f"THEN CAST(strftime('%s', {col}, 'utc') AS INTEGER) ELSE {col} END"
+                    if col in _TIMESTAMP_COLUMNS else col
+                    for col in columns)
+                # WITHOUT ROWID enforces NOT NULL on the primary key
+                where = ' WHERE cve_id IS NOT NULL' if 'cve_id' in columns else ''
+                cur.execute(f'ALTER TABLE {table} RENAME TO {table}_old')
+                cur.execute(ddl)
+                cur.execute(f'''
+                    INSERT OR IGNORE INTO {table} ({', '.join(columns)})
+                    SELECT {select} FROM {table}_old{where}
+                ''')
+                cur.execute(f'DROP TABLE {table}_old')
+    
     def _set_metadata(self, key: str, value: str):
         """Set metadata key-value pair"""
-        self.cursor.execute('''
-            INSERT OR REPLACE INTO metadata (key, value, updated_at)
-            VALUES (?, ?, ?)
-        ''', (key, value, datetime.now().isoformat()))
-        self.conn.commit()
+        with self._write_transaction() as cur:
+            cur.execute(_SQL_SET_METADATA, (key, value, _now_int()))
     
     def _get_metadata(self, key: str) -> Optional[str]:
         """Get metadata value"""
-        self.cursor.execute('SELECT value FROM metadata WHERE key = ?', (key,))
-        result = self.cursor.fetchone()
+        with self._reader() as cur:
+            cur.execute(_SQL_GET_METADATA, (key,))
+            result = cur.fetchone()
         return result[0] if result else None
     
     def cache_epss_score(self, cve_id: str, epss_score: float, percentile: float, 
                         model_version: str = "", score_date: str = ""):
         """Cache an EPSS score"""
-        now = datetime.now().isoformat()
-        self.cursor.execute('''
-            INSERT OR REPLACE INTO epss_cache 
-            (cve_id, epss_score, percentile, model_version, score_date, cached_at, last_accessed)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (cve_id, epss_score, percentile, model_version, score_date, now, now))
-        self.conn.commit()
+        now = _now_int()
+        with self._write_transaction() as cur:
+            cur.execute(_SQL_INSERT_EPSS, (cve_id, epss_score, percentile,
+                                           model_version, score_date, now, now))
+    
+    def cache_epss_scores_bulk(self, scores: List[Dict]):
+        """Cache many EPSS scores in a single transaction.
+
+        Each dict carries ``cve_id``, ``epss`` and ``percentile`` plus optional
+        ``model_version`` and ``score_date``.
+        """
+        now = _now_int()
+        rows = [(s['cve_id'], s['epss'], s['percentile'], s.get('model_version', ''),
+                 s.get('score_date', ''), now, now) for s in scores]
+        if not rows:
+            return
+        with self._write_transaction() as cur:
+            cur.executemany(_SQL_INSERT_EPSS, rows)
+        self._count_bulk_rows(len(rows))
     
     def get_epss_score(self, cve_id: str, max_age_days: int = 7) -> Optional[Dict]:
         """Get cached EPSS score if not expired"""
-        self.cursor.execute('''
-            SELECT epss_score, percentile, model_version, score_date, cached_at 
-            FROM epss_cache 
-            WHERE cve_id = ?
-        ''', (cve_id,))
+        with self._reader() as cur:
+            cur.execute(_SQL_SELECT_EPSS, (cve_id,))
+            result = cur.fetchone()
         
-        result = self.cursor.fetchone()
         if not result:
             return None
         
         # Check if cache is expired
-        cached_at = datetime.fromisoformat(result[4])
-        if datetime.now() - cached_at > timedelta(days=max_age_days):
+        if _now_int() - result[4] > max_age_days * _SECONDS_PER_DAY:
             return None
         
-        # Update last accessed time
-        self.cursor.execute('''
-            UPDATE epss_cache 
-            SET last_accessed = ?
-            WHERE cve_id = ?
-        ''', (datetime.now().isoformat(), cve_id))
-        self.conn.commit()
+        self._touch('epss_cache', cve_id)
         
         return {
             'epss': result[0],
@@ -134,116 +369,253 @@ class EPSSCacheDB:
             'score_date': result[3]
         }
     
+    def get_epss_score_tuple(self, cve_id: str,
+                             max_age_days: int = 7) -> Optional[Tuple[float, float]]:
+        """Get cached (epss, percentile) if not expired, without building a dict"""
+        with self._reader() as cur:
+            cur.execute(_SQL_SELECT_EPSS_PAIR, (cve_id, _now_int() - max_age_days * _SECONDS_PER_DAY))
+            result = cur.fetchone()
+        if result:
+            self._touch('epss_cache', cve_id)
+        return result
+    
+    def get_epss_scores_bulk(self, cve_ids: List[str],
+                             max_age_days: int = 7) -> Dict[str, Tuple[float, float, str, str]]:
+        """Get all unexpired cached EPSS scores for cve_ids with IN (...) queries.
+
+        Values are (epss, percentile, model_version, score_date) rows as
+        returned by the cursor. CVEs that are missing or expired are absent.
+        """
+        cutoff = _now_int() - max_age_days * _SECONDS_PER_DAY
+        scores = {}
+        with self._reader() as cur:
+            for i in range(0, len(cve_ids), self.BULK_SELECT_CHUNK):
+                chunk = cve_ids[i:i + self.BULK_SELECT_CHUNK]
+                cur.execute(
+                    _SQL_SELECT_EPSS_IN.format(placeholders=','.join('?' * len(chunk))),
+                    (*chunk, cutoff))
+                for row in cur.fetchall():
+                    scores[row[0]] = row[1:]
+        for cve_id in scores:
+            self._touch('epss_cache', cve_id)
+        return scores
+    
     def cache_cisa_kev(self, cve_id: str, vendor_project: str, product: str,
                        vulnerability_name: str, date_added: str, short_description: str,
                        required_action: str, due_date: str):
         """Cache a CISA KEV entry"""
-        now = datetime.now().isoformat()
-        self.cursor.execute('''
-            INSERT OR REPLACE INTO cisa_kev_cache 
-            (cve_id, vendor_project, product, vulnerability_name, date_added,
-             short_description, required_action, due_date, cached_at, last_accessed)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (cve_id, vendor_project, product, vulnerability_name, date_added,
-              short_description, required_action, due_date, now, now))
-        self.conn.commit()
+        now = _now_int()
+        with self._write_transaction() as cur:
+            cur.execute(_SQL_INSERT_KEV, (cve_id, vendor_project, product,
+                                          vulnerability_name, date_added,
+                                          short_description, required_action,
+                                          due_date, now, now))
+        self._kev_snapshot = None
+    
+    def cache_cisa_kev_bulk(self, entries: List[tuple]):
+        """Cache many CISA KEV entries in a single transaction.
+
+        Each tuple follows the ``cache_cisa_kev`` argument order. Callers pass
+        a complete catalog, so the transaction only lasts as long as the inserts.
+        """
+        if not entries:
+            return
+        now = _now_int()
+        with self._write_transaction() as cur:
+            for i in range(0, len(entries), self.BULK_WRITE_CHUNK):
+                cur.executemany(_SQL_INSERT_KEV, [tuple(entry) + (now, now)
+                                                  for entry in entries[i:i + self.BULK_WRITE_CHUNK]])
+        self._kev_snapshot = None
+        self._count_bulk_rows(len(entries))
     
     def is_in_cisa_kev(self, cve_id: str, max_age_days: int = 1) -> bool:
         """Check if CVE is in CISA KEV (with cache expiration)"""
-        self.cursor.execute('''
-            SELECT cached_at FROM cisa_kev_cache WHERE cve_id = ?
-        ''', (cve_id,))
+        cutoff = _now_int() - max_age_days * _SECONDS_PER_DAY
+        with self._reader() as cur:
+            cur.execute(_SQL_SELECT_KEV, (cve_id, cutoff))
+            found = cur.fetchone() is not None
         
-        result = self.cursor.fetchone()
-        if not result:
+        # No row means absent or expired; either way it needs a refresh
+        if not found:
             return False
         
-        # Check if cache is expired
-        cached_at = datetime.fromisoformat(result[0])
-        if datetime.now() - cached_at > timedelta(days=max_age_days):
-            # Cache expired, need to refresh
-            return False
-        
-        # Update last accessed time
-        self.cursor.execute('''
-            UPDATE cisa_kev_cache 
-            SET last_accessed = ?
-            WHERE cve_id = ?
-        ''', (datetime.now().isoformat(), cve_id))
-        self.conn.commit()
+        self._touch('cisa_kev_cache', cve_id)
         
         return True
     
     def get_all_cisa_kev_cves(self, max_age_days: int = 1) -> set:
         """Get all CVEs in CISA KEV cache"""
-        cutoff = (datetime.now() - timedelta(days=max_age_days)).isoformat()
-        self.cursor.execute('''
-            SELECT cve_id FROM cisa_kev_cache 
-            WHERE cached_at > ?
-        ''', (cutoff,))
-        
-        return {row[0] for row in self.cursor.fetchall()}
+        cutoff = _now_int() - max_age_days * _SECONDS_PER_DAY
+        with self._reader() as cur:
+            cur.execute(_SQL_SELECT_KEV_SINCE, (cutoff,))
+            return {row[0] for row in cur.fetchall()}
+    
+    def load_kev_snapshot(self, max_age_days: int = 1) -> FrozenSet[str]:
+        """Load all valid KEV CVEs once for in-memory membership checks.
+
+        The snapshot is kept on the instance and reused until it is older than
+        KEV_SNAPSHOT_TTL seconds or the KEV table is written to.
+        """
+        if self._kev_snapshot is not None:
+            loaded_at, snapshot_age_days, snapshot = self._kev_snapshot
+            if (snapshot_age_days == max_age_days
+                    and time.monotonic() - loaded_at < self.KEV_SNAPSHOT_TTL):
+                return snapshot
+        snapshot = frozenset(self.get_all_cisa_kev_cves(max_age_days))
+        self._kev_snapshot = (time.monotonic(), max_age_days, snapshot)
+        return snapshot
+    
+    def get_kev_conditional_headers(self) -> Dict[str, str]:
+        """Build If-None-Match / If-Modified-Since headers for the KEV feed.
+
+        Empty when nothing is cached, since a 304 could not be served locally.
+        """
+        with self._reader() as cur:
+            cur.execute(_SQL_ANY_KEV)
+            if cur.fetchone() is None:
+                return {}
+        headers = {}
+        etag = self._get_metadata('kev_etag')
+        if etag:
+            headers['If-None-Match'] = etag
+        last_modified = self._get_metadata('kev_last_modified')
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return headers
+    
+    def set_kev_validators(self, etag: Optional[str], last_modified: Optional[str]):
+        """Store the ETag / Last-Modified of the KEV feed just cached"""
+        self._set_metadata('kev_etag', etag or '')
+        self._set_metadata('kev_last_modified', last_modified or '')
+    
+    def refresh_cisa_kev_cache(self) -> int:
+        """Mark every cached KEV entry fresh after a 304 Not Modified"""
+        with self._write_transaction() as cur:
+            cur.execute(_SQL_REFRESH_KEV, (_now_int(),))
+            refreshed = cur.rowcount
+        self._kev_snapshot = None
+        return refreshed
     
     def log_api_call(self, api_type: str, endpoint: str, parameters: Dict,
                      status_code: int, response_time: float, cached: bool = False):
-        """Log an API call"""
-        self.cursor.execute('''
-            INSERT INTO api_call_log 
-            (api_type, endpoint, parameters, status_code, response_time, cached, timestamp)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (api_type, endpoint, json.dumps(parameters), status_code, 
-              response_time, cached, datetime.now().isoformat()))
-        self.conn.commit()
+        """Log an API call; rows are buffered and written by flush_api_log"""
+        if not self.log_api_calls:
+            return
+        with self._buffer_lock:
+            self._api_log_buffer.append((api_type, endpoint, parameters, status_code,
+                                         response_time, cached, _now_int()))
+            due = len(self._api_log_buffer) >= self.API_LOG_FLUSH_THRESHOLD
+        if due:
+            self.flush_api_log()
+    
+    def flush_api_log(self):
+        """Write buffered API call log rows in a single transaction"""
+        with self._buffer_lock:
+            buffered, self._api_log_buffer = self._api_log_buffer, []
+        if not buffered:
+            return
+        with self._write_transaction() as cur:
+            # parameters are only JSON-encoded here, off the per-request path
+            cur.executemany(_SQL_INSERT_API_CALL,
+                            [row[:2] + (json.dumps(row[2]),) + row[3:] for row in buffered])
     
     def get_cache_stats(self) -> Dict:
         """Get cache statistics"""
+        self.flush_api_log()
         stats = {}
         
-        # EPSS cache stats
-        self.cursor.execute('SELECT COUNT(*) FROM epss_cache')
-        stats['epss_cached_entries'] = self.cursor.fetchone()[0]
-        
-        # CISA KEV cache stats
-        self.cursor.execute('SELECT COUNT(*) FROM cisa_kev_cache')
-        stats['cisa_kev_cached_entries'] = self.cursor.fetchone()[0]
-        
-        # API call stats
-        self.cursor.execute('SELECT COUNT(*) FROM api_call_log')
-        stats['total_api_calls'] = self.cursor.fetchone()[0]
-        
-        self.cursor.execute('SELECT COUNT(*) FROM api_call_log WHERE cached = 1')
-        stats['cached_api_calls'] = self.cursor.fetchone()[0]
-        
-        # Recent API calls
-        self.cursor.execute('''
-            SELECT api_type, COUNT(*) 
-            FROM api_call_log 
-            WHERE timestamp > datetime('now', '-24 hours')
-            GROUP BY api_type
-        ''')
-        stats['recent_calls_by_type'] = dict(self.cursor.fetchall())
+        with self._reader() as cur:
+            cur.execute(_SQL_CACHE_COUNTS)
+            (stats['epss_cached_entries'], stats['cisa_kev_cached_entries'],
+             stats['total_api_calls'], stats['cached_api_calls']) = cur.fetchone()
+            
+            # Recent API calls
+            cur.execute(_SQL_RECENT_CALLS_BY_TYPE, (_now_int() - _SECONDS_PER_DAY,))
+            stats['recent_calls_by_type'] = dict(cur.fetchall())
         
         return stats
     
     def clear_expired_cache(self, epss_max_age_days: int = 7, kev_max_age_days: int = 1):
         """Clear expired cache entries"""
-        epss_cutoff = (datetime.now() - timedelta(days=epss_max_age_days)).isoformat()
-        kev_cutoff = (datetime.now() - timedelta(days=kev_max_age_days)).isoformat()
-        
-        self.cursor.execute('DELETE FROM epss_cache WHERE cached_at < ?', (epss_cutoff,))
-        epss_deleted = self.cursor.rowcount
-        
-        self.cursor.execute('DELETE FROM cisa_kev_cache WHERE cached_at < ?', (kev_cutoff,))
-        kev_deleted = self.cursor.rowcount
+        now = _now_int()
+        epss_cutoff = now - epss_max_age_days * _SECONDS_PER_DAY
+        kev_cutoff = now - kev_max_age_days * _SECONDS_PER_DAY
         
-        self.conn.commit()
+        with self._write_transaction() as cur:
+            cur.execute('DELETE FROM epss_cache WHERE cached_at < ?', (epss_cutoff,))
+            epss_deleted = cur.rowcount
+            
+            cur.execute('DELETE FROM cisa_kev_cache WHERE cached_at < ?', (kev_cutoff,))
+            kev_deleted = cur.rowcount
+        self._kev_snapshot = None
         
         return {'epss_deleted': epss_deleted, 'kev_deleted': kev_deleted}
     
+    def _touch(self, table: str, cve_id: str):
+        """Record a cache hit; last_accessed is written in batches"""
+        with self._buffer_lock:
+            self._touch_buffer[table].append(cve_id)
+            self._touch_count += 1
+            due = self._touch_count >= self.TOUCH_FLUSH_THRESHOLD
+        if due:
+            self.flush_touches()
+    
+    def flush_touches(self):
+        """Write buffered last_accessed updates in a single transaction"""
+        with self._buffer_lock:
+            if not self._touch_count:
+                return
+            buffered = self._touch_buffer
+            self._touch_buffer = {table: [] for table in buffered}
+            self._touch_count = 0
+        now = _now_int()
+        with self._write_transaction() as cur:
+            for table, cve_ids in buffered.items():
+                if cve_ids:
+                    cur.executemany(_SQL_TOUCH[table], [(now, cve_id) for cve_id in cve_ids])
+    
+    def _count_bulk_rows(self, count: int):
+        """Run a passive WAL checkpoint once enough bulk rows have been written"""
+        with self._buffer_lock:
+            self._rows_since_checkpoint += count
+            if self._rows_since_checkpoint < self.CHECKPOINT_INTERVAL_ROWS:
+                return
+            self._rows_since_checkpoint = 0
+        with self._writer_lock:
+            try:
+                # PASSIVE never waits on readers; whatever they pin is left for later
+                self._writer_conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+            except sqlite3.OperationalError:
+                pass
+    
     def close(self):
-        """Close database connection"""
-        if self.conn:
-            self.conn.close()
+        """Close database connections"""
+        if not self._writer_conn:
+            return
+        # Everything before the final close() is best-effort: a database locked
+        # by another process costs at most CLOSE_BUSY_TIMEOUT_MS per step and
+        # never leaves connections open or replaces the caller's exception
+        try:
+            self._writer_conn.execute(f"PRAGMA busy_timeout={self.CLOSE_BUSY_TIMEOUT_MS}")
+            self.flush_touches()
+            self.flush_api_log()
+        except sqlite3.Error:
+            pass
+        finally:
+            while True:
+                try:
+                    self._reader_pool.get_nowait().close()
+                except queue.Empty:
+                    break
+        # Refresh planner statistics and leave a truncated WAL for the next process
+        try:
+            self._writer_conn.execute("PRAGMA optimize")
+            self._writer_conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        except sqlite3.Error:
+            pass
+        finally:
+            self._writer_conn.close()
+            self._writer_conn = None
     
     def __enter__(self):
         """Context manager entry"""
@@ -3,6 +3,8 @@
 import sys
 import os
 import argparse
+import statistics
+from collections import Counter
 
 
 def main():
@@ -196,7 +198,9 @@ Output Formats:
 
     # Statistics
     epss_scores = [v.epss_score for v in results if v.epss_score and v.epss_score > 0]
-    cisa_kev_count = len([v for v in results if v.in_cisa_kev])
+    cisa_kev_count = sum(1 for v in results if v.in_cisa_kev)
+    risk_counts = Counter(v.risk_level.value for v in results)
+    criticality_counts = Counter(v.asset_criticality.name for v in results)
 
     print()
     print("=" * 70)
@@ -208,30 +212,37 @@ Output Formats:
     print(f"CVEs in CISA KEV: {cisa_kev_count} ({cisa_kev_count/len(results)*100:.1f}%)")
 
     if epss_scores:
+        avg_epss = sum(epss_scores) / len(epss_scores)
+        max_epss = max(epss_scores)
         print()
         print(f"EPSS Score Statistics:")
-        print(f"  Average: {sum(epss_scores)/len(epss_scores):.4f} ({sum(epss_scores)/len(epss_scores)*100:.2f}%)")
-        print(f"  Maximum: {max(epss_scores):.4f} ({max(epss_scores)*100:.2f}%)")
-        print(f"  Median:  {sorted(epss_scores)[len(epss_scores)//2]:.4f}")
+        print(f"  Average: {avg_epss:.4f} ({avg_epss*100:.2f}%)")
+        print(f"  Maximum: {max_epss:.4f} ({max_epss*100:.2f}%)")
+        print(f"  Median:  {statistics.median(epss_scores):.4f}")
+
+        # Very High, High, Medium, Low in a single pass
+        buckets = [0, 0, 0, 0]
+        for s in epss_scores:
+            buckets[0 if s > 0.5 else 1 if s > 0.1 else 2 if s > 0.01 else 3] += 1
 
         print()
         print("Exploitation Probability Distribution:")
-        print(f"  Very High (>50%):  {len([s for s in epss_scores if s > 0.5])} CVEs")
-        print(f"  High (10-50%):     {len([s for s in epss_scores if 0.1 < s <= 0.5])} CVEs")
-        print(f"  Medium (1-10%):    {len([s for s in epss_scores if 0.01 < s <= 0.1])} CVEs")
-        print(f"  Low (<1%):         {len([s for s in epss_scores if 0 < s <= 0.01])} CVEs")
+        print(f"  Very High (>50%):  {buckets[0]} CVEs")
+        print(f"  High (10-50%):     {buckets[1]} CVEs")
+        print(f"  Medium (1-10%):    {buckets[2]} CVEs")
+        print(f"  Low (<1%):         {buckets[3]} CVEs")
 
     print()
     print("Risk Level Distribution:")
     for level in ['CRITICAL', 'HIGH', 'MEDIUM', 'LOW', 'MINIMAL']:
-        count = len([v for v in results if v.risk_level.value == level])
+        count = risk_counts.get(level, 0)
         pct = (count / len(results) * 100) if results else 0
         print(f"  {level:8s}: {count:3d} ({pct:5.1f}%)")
 
     print()
     print("Asset Criticality Distribution:")
     for crit in ['CRITICAL', 'HIGH', 'MEDIUM', 'LOW', 'MINIMAL']:
-        count = len([v for v in results if v.asset_criticality.name == crit])
+        count = criticality_counts.get(crit, 0)
         pct = (count / len(results) * 100) if results else 0
         if count > 0:
             print(f"  {crit:8s}: {count:3d} ({pct:5.1f}%)")
@@ -253,7 +264,7 @@ Output Formats:
     print("  3. Focus on remediating CRITICAL and HIGH priority items")
     print()
 
-    critical_count = len([v for v in results if v.risk_level.value == 'CRITICAL'])
+    critical_count = risk_counts.get('CRITICAL', 0)
     if critical_count > 0:
         print(f"[WARNING] {critical_count} CRITICAL vulnerabilities requiring immediate action")
         print()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+
+import io
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from connectors.threat_intel.cisa_kev import CISAKEVProvider
+from epss_cache_db import EPSSCacheDB as StandaloneCacheDB
+from vulnerability_prioritizer import EPSSCacheDB, VulnerabilityPrioritizer
+
+CONFIG_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "prioritizer_config.json")
+
+
+def _kev_entry(cve_id):
+    return {"cveID": cve_id, "vendorProject": "Vendor", "product": "Product",
+            "vulnerabilityName": "Name", "dateAdded": "2024-01-01",
+            "shortDescription": "Desc", "requiredAction": "Patch", "dueDate": "2024-02-01"}
+
+
+class FakeResponse:
+    def __init__(self, status_code, entries=(), headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.raw = io.BytesIO(json.dumps({"vulnerabilities": list(entries)}).encode())
+
+    def json(self):
+        return json.loads(self.raw.getvalue())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def _failing_stream(count):
+    def iter_entries(response):
+        for i in range(count):
+            yield _kev_entry(f"CVE-2024-{i:04d}")
+        raise ConnectionError("stream reset")
+    return iter_entries
+
+
+class FakeSession:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, headers=None, **kwargs):
+        self.requests.append(headers or {})
+        return self.responses.pop(0)
+
+
+class KEVTestCase(unittest.TestCase):
+    """Temp directory plus the inline cache the app hands to CISAKEVProvider"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, "cache.db")
+        self.db = EPSSCacheDB(self.db_path)
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.addCleanup(self.db.close)
+
+    def _prioritizer(self):
+        prioritizer = VulnerabilityPrioritizer(config_file=CONFIG_FILE, cache_db_path=self.db_path)
+        self.addCleanup(prioritizer.db.close)
+        return prioritizer
+
+    def _age_kev_rows(self):
+        """Push every cached KEV row past the one-day freshness window"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("UPDATE cisa_kev_cache SET cached_at = datetime('now', '-2 days')")
+        conn.close()
+
+
+class TestCISAKEVConditionalGet(KEVTestCase):
+    def test_provider_reuses_cache_on_not_modified(self):
+        session = FakeSession(
+            FakeResponse(200, [_kev_entry("CVE-2024-0001")], headers={"ETag": '"v1"'}),
+            FakeResponse(304),
+        )
+        with mock.patch("connectors.threat_intel.cisa_kev.SESSION", session):
+            self.assertEqual(CISAKEVProvider(cache_db=self.db)._fetch_kev(), {"CVE-2024-0001"})
+            self._age_kev_rows()
+            kev_set = CISAKEVProvider(cache_db=self.db)._fetch_kev()
+
+        self.assertNotIn("If-None-Match", session.requests[0])
+        self.assertEqual(session.requests[1]["If-None-Match"], '"v1"')
+        self.assertEqual(kev_set, {"CVE-2024-0001"})
+        self.assertEqual(self.db.get_all_cisa_kev_cves(), {"CVE-2024-0001"})
+
+    def test_provider_with_standalone_cache_reuses_cache_on_not_modified(self):
+        db = StandaloneCacheDB(os.path.join(self.tmpdir, "standalone.db"))
+        self.addCleanup(db.close)
+        session = FakeSession(
+            FakeResponse(200, [_kev_entry("CVE-2024-0001")], headers={"ETag": '"v1"'}),
+            FakeResponse(304),
+        )
+        with mock.patch("connectors.threat_intel.cisa_kev.SESSION", session):
+            self.assertEqual(CISAKEVProvider(cache_db=db)._fetch_kev(), {"CVE-2024-0001"})
+            db._writer_conn.execute("UPDATE cisa_kev_cache SET cached_at = cached_at - 2 * 86400")
+            kev_set = CISAKEVProvider(cache_db=db)._fetch_kev()
+
+        self.assertEqual(session.requests[1]["If-None-Match"], '"v1"')
+        self.assertEqual(kev_set, {"CVE-2024-0001"})
+        self.assertEqual(db.load_kev_snapshot(), frozenset({"CVE-2024-0001"}))
+
+    def test_prioritizer_reuses_cache_on_not_modified(self):
+        session = FakeSession(
+            FakeResponse(200, [_kev_entry("CVE-2024-0001")], headers={"Last-Modified": "Mon, 01 Jan 2024"}),
+            FakeResponse(304),
+        )
+        prioritizer = self._prioritizer()
+        with mock.patch("vulnerability_prioritizer.SESSION", session):
+            prioritizer.fetch_cisa_kev()
+            self._age_kev_rows()
+            prioritizer.cisa_kev_cache = set()
+            kev_set = prioritizer.fetch_cisa_kev()
+
+        self.assertEqual(session.requests[1]["If-Modified-Since"], "Mon, 01 Jan 2024")
+        self.assertEqual(kev_set, {"CVE-2024-0001"})
+
+
+class TestCISAKEVStreamFailure(KEVTestCase):
+    def test_provider_caches_nothing_from_a_truncated_stream(self):
+        provider = CISAKEVProvider(cache_db=self.db)
+        with mock.patch("connectors.threat_intel.cisa_kev.SESSION", FakeSession(FakeResponse(200))), \
+                mock.patch("connectors.threat_intel.cisa_kev.iter_kev_entries", _failing_stream(700)):
+            self.assertEqual(provider._fetch_kev(), set())
+        self.assertIsNone(self.db.get_all_cisa_kev_cves())
+
+    def test_prioritizer_caches_nothing_from_a_truncated_stream(self):
+        prioritizer = self._prioritizer()
+        with mock.patch("vulnerability_prioritizer.SESSION", FakeSession(FakeResponse(200))), \
+                mock.patch("vulnerability_prioritizer.iter_kev_entries", _failing_stream(700)):
+            self.assertEqual(prioritizer.fetch_cisa_kev(), set())
+        self.assertIsNone(self.db.get_all_cisa_kev_cves())
+
+    def test_no_write_lock_is_held_while_the_feed_streams(self):
+        db = StandaloneCacheDB(os.path.join(self.tmpdir, "standalone.db"))
+        self.addCleanup(db.close)
+        lock_free = []
+
+        def iter_entries(response):
+            for i in range(700):
+                if i == 600:
+                    other = sqlite3.connect(db.db_path, timeout=0, isolation_level=None)
+                    try:
+                        other.execute("BEGIN IMMEDIATE")
+                        other.execute("ROLLBACK")
+                        lock_free.append(True)
+                    except sqlite3.OperationalError:
+                        lock_free.append(False)
+                    finally:
+                        other.close()
+                yield _kev_entry(f"CVE-2024-{i:04d}")
+
+        with mock.patch("connectors.threat_intel.cisa_kev.SESSION", FakeSession(FakeResponse(200))), \
+                mock.patch("connectors.threat_intel.cisa_kev.iter_kev_entries", iter_entries):
+            self.assertEqual(len(CISAKEVProvider(cache_db=db)._fetch_kev()), 700)
+        self.assertEqual(lock_free, [True])
+        self.assertEqual(len(db.get_all_cisa_kev_cves()), 700)
+
+
+if __name__ == "__main__":
+    unittest.main()
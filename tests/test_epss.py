@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from connectors.threat_intel.epss import EPSSProvider
+from vulnerability_prioritizer import EPSSCacheDB, VulnerabilityPrioritizer
+
+CONFIG_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "prioritizer_config.json")
+
+CVE_IDS = [f"CVE-2024-{i:04d}" for i in range(1000)]
+# 1000 CVEs split into 150-CVE batches: six full ones and a final 100
+BATCHES = [CVE_IDS[i:i + 150] for i in range(0, 1000, 150)]
+
+
+class FakeResponse:
+    def __init__(self, status_code, data=None):
+        self.status_code = status_code
+        self._data = data or {}
+
+    def json(self):
+        return self._data
+
+
+class FakeEPSSSession:
+    """Scores every requested CVE, except the batches named in `failures`"""
+
+    def __init__(self, failures=None):
+        self.failures = failures or {}
+        self.batches = []
+        self._lock = threading.Lock()
+
+    def get(self, url, params=None, **kwargs):
+        cves = params["cve"].split(",")
+        with self._lock:
+            self.batches.append(cves)
+        failure = self.failures.get(cves[0])
+        if isinstance(failure, Exception):
+            raise failure
+        if failure is not None:
+            return FakeResponse(failure)
+        return FakeResponse(200, {
+            "model_version": "v2023.03.01", "score_date": "2024-10-01",
+            "data": [{"cve": cve, "epss": "0.25", "percentile": "0.75"} for cve in cves],
+        })
+
+
+class EPSSTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db = EPSSCacheDB(os.path.join(self.tmpdir, "cache.db"))
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.addCleanup(self.db.close)
+
+        # Cache writes are only allowed from the thread that asked for the scores
+        self.writer_threads = set()
+        cache_epss_scores_bulk = self.db.cache_epss_scores_bulk
+
+        def record_writer(scores):
+            self.writer_threads.add(threading.get_ident())
+            cache_epss_scores_bulk(scores)
+
+        self.db.cache_epss_scores_bulk = record_writer
+
+    def _record_delays(self, owner, method_name):
+        """Patch a batch fetcher to log its rate-limit delay and skip the sleep"""
+        delays = {}
+        original = getattr(owner, method_name)
+
+        def fetch(self_, batch, delay=0.0):
+            delays[batch[0]] = delay
+            return original(self_, batch, 0.0)
+
+        self.addCleanup(setattr, owner, method_name, original)
+        setattr(owner, method_name, fetch)
+        return delays
+
+    def assert_first_batch_per_worker_undelayed(self, delays, rate_limit_delay, max_workers=4):
+        self.assertEqual(
+            [delays[batch[0]] for batch in BATCHES],
+            [0.0] * max_workers + [rate_limit_delay] * (len(BATCHES) - max_workers),
+        )
+
+
+class TestPrioritizerEPSSFetch(EPSSTestCase):
+    def setUp(self):
+        super().setUp()
+        with mock.patch("vulnerability_prioritizer.EPSSCacheDB", return_value=self.db):
+            self.prioritizer = VulnerabilityPrioritizer(config_file=CONFIG_FILE)
+        self.delays = self._record_delays(VulnerabilityPrioritizer, "_fetch_epss_batch")
+
+    def test_failed_batch_falls_back_while_the_rest_are_cached(self):
+        session = FakeEPSSSession(failures={BATCHES[2][0]: 503})
+        with mock.patch("vulnerability_prioritizer.SESSION", session):
+            epss_data = self.prioritizer.fetch_epss_scores(CVE_IDS)
+
+        self.assertEqual(sorted(len(batch) for batch in session.batches), [100] + [150] * 6)
+        self.assertEqual(len(epss_data), 1000)
+        self.assertEqual({epss_data[cve]["epss"] for cve in BATCHES[2]}, {0.0})
+        self.assertEqual(sum(1 for entry in epss_data.values() if entry["epss"] == 0.25), 850)
+        self.assertEqual(len(self.db.get_epss_scores_bulk(CVE_IDS)), 850)
+        self.assertEqual(self.writer_threads, {threading.get_ident()})
+        self.assert_first_batch_per_worker_undelayed(
+            self.delays, self.prioritizer.config["api_settings"]["rate_limit_delay"])
+
+    def test_cached_scores_are_not_refetched(self):
+        with mock.patch("vulnerability_prioritizer.SESSION", FakeEPSSSession()):
+            self.prioritizer.fetch_epss_scores(CVE_IDS[:300])
+        session = FakeEPSSSession()
+        with mock.patch("vulnerability_prioritizer.SESSION", session):
+            epss_data = self.prioritizer.fetch_epss_scores(CVE_IDS[:450])
+
+        self.assertEqual(session.batches, [CVE_IDS[300:450]])
+        self.assertEqual(epss_data[CVE_IDS[0]]["epss"], 0.25)
+
+
+class TestEPSSProviderFetch(EPSSTestCase):
+    def setUp(self):
+        super().setUp()
+        self.provider = EPSSProvider(cache_db=self.db, rate_limit_delay=0.5)
+        self.delays = self._record_delays(EPSSProvider, "_fetch_batch")
+
+    def test_failed_batches_are_skipped_while_the_rest_are_cached(self):
+        session = FakeEPSSSession(failures={BATCHES[2][0]: ConnectionError("reset"),
+                                            BATCHES[5][0]: 503})
+        with mock.patch("connectors.threat_intel.epss.SESSION", session):
+            epss_data = self.provider._fetch_scores(CVE_IDS)
+
+        self.assertEqual(len(session.batches), len(BATCHES))
+        self.assertEqual(set(epss_data), set(CVE_IDS) - set(BATCHES[2]) - set(BATCHES[5]))
+        self.assertEqual(epss_data[CVE_IDS[0]], {"epss": 0.25, "percentile": 0.75})
+        self.assertEqual(len(self.db.get_epss_scores_bulk(CVE_IDS)), 700)
+        self.assertEqual(self.writer_threads, {threading.get_ident()})
+        self.assert_first_batch_per_worker_undelayed(self.delays, 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from epss_cache_db import EPSSCacheDB
+
+
+class TestEPSSCacheDB(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db = EPSSCacheDB(os.path.join(self.tmpdir, "cache.db"))
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_wal_journal_mode_enabled(self):
+        mode = self.db._writer_conn.execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode, "wal")
+
+    def test_expiry_queries_use_cached_at_index(self):
+        plan = self.db._writer_conn.execute(
+            "EXPLAIN QUERY PLAN SELECT cve_id FROM cisa_kev_cache WHERE cached_at > ?", ("",)
+        ).fetchall()
+        self.assertIn("idx_kev_cached_at", " ".join(row[-1] for row in plan))
+
+    def test_redundant_kev_index_is_dropped(self):
+        self.db._writer_conn.execute(
+            "CREATE INDEX idx_kev_cveid_cached ON cisa_kev_cache(cve_id, cached_at)")
+        self.db.close()
+        self.db = EPSSCacheDB(self.db.db_path)
+        indexes = {row[1] for row in self.db._writer_conn.execute("PRAGMA index_list(cisa_kev_cache)")}
+        self.assertNotIn("idx_kev_cveid_cached", indexes)
+
+    def test_expired_kev_entry_is_not_reported(self):
+        self.db.cache_cisa_kev("CVE-2024-0001", "Vendor", "Product", "Name",
+                               "2024-01-01", "Desc", "Patch", "2024-02-01")
+        self.db._writer_conn.execute("UPDATE cisa_kev_cache SET cached_at = cached_at - 2 * 86400")
+        self.assertFalse(self.db.is_in_cisa_kev("CVE-2024-0001"))
+        self.assertTrue(self.db.is_in_cisa_kev("CVE-2024-0001", max_age_days=3))
+
+    def test_bulk_epss_insert_round_trips(self):
+        self.db.cache_epss_scores_bulk([
+            {"cve_id": "CVE-2024-0001", "epss": 0.9, "percentile": 0.99,
+             "model_version": "v2023.03.01", "score_date": "2024-10-01"},
+            {"cve_id": "CVE-2024-0002", "epss": 0.01, "percentile": 0.2},
+        ])
+        score = self.db.get_epss_score("CVE-2024-0001")
+        self.assertEqual(score["epss"], 0.9)
+        self.assertEqual(score["model_version"], "v2023.03.01")
+        self.assertEqual(self.db.get_epss_score("CVE-2024-0002")["percentile"], 0.2)
+
+    def test_bulk_epss_lookup_skips_missing_and_expired(self):
+        self.db.cache_epss_scores_bulk([
+            {"cve_id": "CVE-2024-0001", "epss": 0.9, "percentile": 0.99},
+            {"cve_id": "CVE-2024-0002", "epss": 0.01, "percentile": 0.2},
+        ])
+        self.db._writer_conn.execute(
+            "UPDATE epss_cache SET cached_at = cached_at - 8 * 86400 WHERE cve_id = 'CVE-2024-0002'"
+        )
+        scores = self.db.get_epss_scores_bulk(["CVE-2024-0001", "CVE-2024-0002", "CVE-2024-0003"])
+        self.assertEqual(scores, {"CVE-2024-0001": (0.9, 0.99, "", "")})
+
+    def test_epss_score_tuple(self):
+        self.db.cache_epss_score("CVE-2024-0001", 0.5, 0.9)
+        self.assertEqual(self.db.get_epss_score_tuple("CVE-2024-0001"), (0.5, 0.9))
+        self.assertIsNone(self.db.get_epss_score_tuple("CVE-2024-0002"))
+
+    def test_bulk_kev_insert_round_trips(self):
+        self.db.cache_cisa_kev_bulk([
+            ("CVE-2024-0001", "Vendor", "Product", "Name", "2024-01-01",
+             "Desc", "Patch", "2024-02-01"),
+            ("CVE-2024-0002", "Vendor", "Product", "Name", "2024-01-01",
+             "Desc", "Patch", "2024-02-01"),
+        ])
+        self.assertTrue(self.db.is_in_cisa_kev("CVE-2024-0001"))
+        self.assertEqual(self.db.get_all_cisa_kev_cves(),
+                         {"CVE-2024-0001", "CVE-2024-0002"})
+        self.assertFalse(self.db.is_in_cisa_kev("CVE-2024-9999"))
+
+    def test_cache_hits_do_not_write_until_flushed(self):
+        self.db.cache_epss_score("CVE-2024-0001", 0.5, 0.9)
+        self.db._writer_conn.execute("UPDATE epss_cache SET last_accessed = ''")
+        self.assertIsNotNone(self.db.get_epss_score("CVE-2024-0001"))
+        last_accessed = "SELECT last_accessed FROM epss_cache WHERE cve_id = 'CVE-2024-0001'"
+        self.assertEqual(self.db._writer_conn.execute(last_accessed).fetchone()[0], "")
+        self.db.flush_touches()
+        self.assertNotEqual(self.db._writer_conn.execute(last_accessed).fetchone()[0], "")
+
+    def test_kev_snapshot_refreshes_after_write(self):
+        self.assertEqual(self.db.load_kev_snapshot(), frozenset())
+        self.db.cache_cisa_kev("CVE-2024-0001", "Vendor", "Product", "Name",
+                               "2024-01-01", "Desc", "Patch", "2024-02-01")
+        snapshot = self.db.load_kev_snapshot()
+        self.assertIn("CVE-2024-0001", snapshot)
+        self.assertIs(self.db.load_kev_snapshot(), snapshot)
+
+    def test_cache_stats_counts(self):
+        self.db.cache_epss_score("CVE-2024-0001", 0.5, 0.9)
+        self.db.log_api_call("EPSS", "https://api.first.org/data/v1/epss",
+                             {"cve": "CVE-2024-0001"}, 200, 0.1, False)
+        self.db.log_api_call("EPSS", "https://api.first.org/data/v1/epss",
+                             {"cve": "CVE-2024-0001"}, 200, 0.0, True)
+        self.db.log_api_call("CISA_KEV", "https://www.cisa.gov/", {}, 200, 0.2, False)
+        stats = self.db.get_cache_stats()
+        self.assertEqual(stats["epss_cached_entries"], 1)
+        self.assertEqual(stats["cisa_kev_cached_entries"], 0)
+        self.assertEqual(stats["total_api_calls"], 3)
+        self.assertEqual(stats["cached_api_calls"], 1)
+        self.assertEqual(stats["recent_calls_by_type"], {"EPSS": 2, "CISA_KEV": 1})
+
+    def test_api_calls_are_buffered_until_flush(self):
+        self.db.log_api_call("EPSS", "https://api.first.org/data/v1/epss",
+                             {"cve": "CVE-2024-0001"}, 200, 0.1)
+        count = "SELECT COUNT(*) FROM api_call_log"
+        self.assertEqual(self.db._writer_conn.execute(count).fetchone()[0], 0)
+        self.db.flush_api_log()
+        self.assertEqual(self.db._writer_conn.execute(count).fetchone()[0], 1)
+        params = self.db._writer_conn.execute("SELECT parameters FROM api_call_log").fetchone()[0]
+        self.assertEqual(params, '{"cve": "CVE-2024-0001"}')
+
+    def test_concurrent_api_logging_keeps_every_row(self):
+        self.db.API_LOG_FLUSH_THRESHOLD = 16
+
+        def log_calls():
+            for _ in range(200):
+                self.db.log_api_call("EPSS", "https://api.first.org/data/v1/epss", {}, 200, 0.1)
+
+        threads = [threading.Thread(target=log_calls) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.db.get_cache_stats()["total_api_calls"], 8 * 200)
+
+    def test_api_call_logging_can_be_disabled(self):
+        db = EPSSCacheDB(os.path.join(self.tmpdir, "nolog.db"), log_api_calls=False)
+        db.log_api_call("EPSS", "https://api.first.org/data/v1/epss", {}, 200, 0.1)
+        self.assertEqual(db.get_cache_stats()["total_api_calls"], 0)
+        db.close()
+
+    def test_failed_bulk_write_rolls_back(self):
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.db.cache_cisa_kev_bulk([
+                ("CVE-2024-0001", "Vendor", "Product", "Name", "2024-01-01",
+                 "Desc", "Patch", "2024-02-01"),
+                (None, "Vendor", "Product", "Name", "2024-01-01",
+                 "Desc", "Patch", "2024-02-01"),
+            ])
+        self.assertFalse(self.db._writer_conn.in_transaction)
+        self.assertEqual(self.db.get_all_cisa_kev_cves(), set())
+
+    def test_error_after_implicit_rollback_is_not_masked(self):
+        with self.assertRaises(ValueError):
+            with self.db._write_transaction() as cur:
+                # Stands in for SQLite aborting the transaction on its own
+                cur.execute("ROLLBACK")
+                raise ValueError("disk full")
+        self.assertFalse(self.db._writer_conn.in_transaction)
+
+    def test_reads_proceed_while_write_transaction_open(self):
+        self.db.cache_epss_score("CVE-2024-0001", 0.5, 0.9)
+        with self.db._write_transaction() as cur:
+            cur.execute("DELETE FROM epss_cache")
+            # Reader sees the last committed snapshot without waiting
+            self.assertIsNotNone(self.db.get_epss_score("CVE-2024-0001"))
+        self.assertIsNone(self.db.get_epss_score("CVE-2024-0001"))
+
+    def test_reader_connections_are_read_only(self):
+        with self.db._reader() as cur:
+            with self.assertRaises(sqlite3.OperationalError):
+                cur.execute("DELETE FROM epss_cache")
+
+    def test_kev_conditional_headers_need_cached_rows(self):
+        self.db.set_kev_validators('"abc"', "Tue, 01 Oct 2024 00:00:00 GMT")
+        self.assertEqual(self.db.get_kev_conditional_headers(), {})
+        self.db.cache_cisa_kev("CVE-2024-0001", "Vendor", "Product", "Name",
+                               "2024-01-01", "Desc", "Patch", "2024-02-01")
+        self.assertEqual(self.db.get_kev_conditional_headers(), {
+            "If-None-Match": '"abc"',
+            "If-Modified-Since": "Tue, 01 Oct 2024 00:00:00 GMT",
+        })
+
+    def test_refresh_kev_cache_revives_expired_entries(self):
+        self.db.cache_cisa_kev("CVE-2024-0001", "Vendor", "Product", "Name",
+                               "2024-01-01", "Desc", "Patch", "2024-02-01")
+        self.db._writer_conn.execute("UPDATE cisa_kev_cache SET cached_at = cached_at - 2 * 86400")
+        self.assertEqual(self.db.load_kev_snapshot(), frozenset())
+        self.assertEqual(self.db.refresh_cisa_kev_cache(), 1)
+        self.assertEqual(self.db.load_kev_snapshot(), frozenset({"CVE-2024-0001"}))
+
+    def test_chunked_kev_bulk_write_is_all_or_nothing(self):
+        entry = ("Vendor", "Product", "Name", "2024-01-01", "Desc", "Patch", "2024-02-01")
+        entries = [(f"CVE-2024-{i:04d}",) + entry for i in range(1200)]
+        with self.assertRaises(sqlite3.IntegrityError):
+            # The bad row sits in the third executemany chunk
+            self.db.cache_cisa_kev_bulk(entries + [(None,) + entry])
+        self.assertEqual(self.db.get_all_cisa_kev_cves(), set())
+        self.db.cache_cisa_kev_bulk(entries)
+        self.assertEqual(len(self.db.get_all_cisa_kev_cves()), 1200)
+
+    def test_bulk_insert_empty_is_noop(self):
+        self.db.cache_epss_scores_bulk([])
+        self.db.cache_cisa_kev_bulk([])
+        stats = self.db.get_cache_stats()
+        self.assertEqual(stats["epss_cached_entries"], 0)
+        self.assertEqual(stats["cisa_kev_cached_entries"], 0)
+
+    def test_close_truncates_wal(self):
+        self.db.cache_epss_scores_bulk(
+            [{"cve_id": f"CVE-2024-{i:04d}", "epss": 0.1, "percentile": 0.5} for i in range(100)]
+        )
+        wal_path = self.db.db_path + "-wal"
+        self.assertGreater(os.path.getsize(wal_path), 0)
+        self.db.close()
+        self.assertFalse(os.path.exists(wal_path) and os.path.getsize(wal_path) > 0)
+
+    def test_close_does_not_block_on_a_locked_database(self):
+        self.db.cache_epss_score("CVE-2024-0001", 0.5, 0.9)
+        self.assertIsNotNone(self.db.get_epss_score("CVE-2024-0001"))  # buffers a touch
+        other = sqlite3.connect(self.db.db_path, isolation_level=None)
+        other.execute("BEGIN IMMEDIATE")
+        try:
+            started = time.monotonic()
+            self.db.close()
+            self.assertLess(time.monotonic() - started, 2)
+        finally:
+            other.execute("ROLLBACK")
+            other.close()
+        self.assertIsNone(self.db._writer_conn)
+        self.assertTrue(self.db._reader_pool.empty())
+
+    def _wal_frames_after_bulk_writes(self, db):
+        for start in (0, 6, 12):
+            db.cache_epss_scores_bulk(
+                [{"cve_id": f"CVE-2024-{i:04d}", "epss": 0.1, "percentile": 0.5}
+                 for i in range(start, start + 6)]
+            )
+        # (busy, frames in the WAL, frames checkpointed)
+        return db._writer_conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()[1]
+
+    def test_bulk_inserts_checkpoint_periodically(self):
+        unchecked = EPSSCacheDB(os.path.join(self.tmpdir, "unchecked.db"))
+        unchecked.CHECKPOINT_INTERVAL_ROWS = 1000
+        self.db.CHECKPOINT_INTERVAL_ROWS = 10
+        # Once the second write is backfilled the third one restarts the WAL
+        # from the top, so far fewer frames are left than without checkpoints
+        self.assertLess(self._wal_frames_after_bulk_writes(self.db),
+                        self._wal_frames_after_bulk_writes(unchecked))
+        unchecked.close()
+
+
+class TestEPSSCacheDBMigration(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, "cache.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _create_v1_0_database(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.executescript("""
+            CREATE TABLE epss_cache (
+                cve_id TEXT PRIMARY KEY, epss_score REAL, percentile REAL,
+                model_version TEXT, score_date TEXT, cached_at TEXT, last_accessed TEXT
+            );
+            CREATE TABLE cisa_kev_cache (
+                cve_id TEXT PRIMARY KEY, vendor_project TEXT, product TEXT,
+                vulnerability_name TEXT, date_added TEXT, short_description TEXT,
+                required_action TEXT, due_date TEXT, cached_at TEXT, last_accessed TEXT
+            );
+            CREATE TABLE metadata (key TEXT PRIMARY KEY, value TEXT, updated_at TEXT);
+            INSERT INTO metadata VALUES ('db_version', '1.0', '2024-01-01T00:00:00');
+        """)
+        conn.execute("INSERT INTO epss_cache VALUES (?, ?, ?, ?, ?, ?, ?)",
+                     ("CVE-2024-0001", 0.5, 0.9, "v1", "2024-10-01",
+                      "2024-10-01T00:00:00", "2024-10-01T00:00:00"))
+        conn.commit()
+        conn.close()
+
+    def test_migrates_cache_tables_to_without_rowid(self):
+        self._create_v1_0_database()
+        with EPSSCacheDB(self.db_path) as db:
+            self.assertEqual(db._get_metadata("db_version"), "1.2")
+            for table in ("epss_cache", "cisa_kev_cache"):
+                sql = db._writer_conn.execute(
+                    "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+                ).fetchone()[0]
+                self.assertIn("WITHOUT ROWID", sql)
+            row = db._writer_conn.execute(
+                "SELECT epss_score FROM epss_cache WHERE cve_id = ?", ("CVE-2024-0001",)
+            ).fetchone()
+            self.assertEqual(row[0], 0.5)
+
+    def test_migrates_iso_timestamps_to_epoch_seconds(self):
+        self._create_v1_0_database()
+        with EPSSCacheDB(self.db_path) as db:
+            cached_at, last_accessed = db._writer_conn.execute(
+                "SELECT cached_at, last_accessed FROM epss_cache WHERE cve_id = ?",
+                ("CVE-2024-0001",)
+            ).fetchone()
+            expected = int(time.mktime((2024, 10, 1, 0, 0, 0, 0, 0, -1)))
+            self.assertEqual(cached_at, expected)
+            self.assertEqual(last_accessed, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -8,14 +8,14 @@ import os
 import sqlite3
 import time
 import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from enum import Enum
 from typing import Any, Dict, List, Optional, Set
 
-import requests
-
 from connectors.base import NormalizedVulnerability, ScannerConnector, ThreatIntelProvider
+from connectors.http import SESSION
 from connectors.scanners.nessus import NessusConnector
 from connectors.scanners.qualys_csv import QualysCSVConnector
 from connectors.scanners.qualys_xml import QualysXMLConnector
@@ -23,7 +23,7 @@ from connectors.scanners.openvas import OpenVASConnector
 from connectors.scanners.rapid7 import Rapid7Connector
 from connectors.scanners.blackduck import BlackDuckConnector
 from connectors.threat_intel.epss import EPSSProvider
-from connectors.threat_intel.cisa_kev import CISAKEVProvider
+from connectors.threat_intel.cisa_kev import CISAKEVProvider, iter_kev_entries
 from engine.correlator import VulnerabilityCorrelator
 from engine.scorer import VulnerabilityScorer
 
@@ -156,6 +156,13 @@ class EPSSCacheDB:
                     timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS metadata (
+                    key TEXT PRIMARY KEY,
+                    value TEXT,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
             self.conn.commit()
         except Exception:
             self.conn = None
@@ -179,6 +186,26 @@ class EPSSCacheDB:
             pass
         return None
 
+    def get_epss_scores_bulk(self, cve_ids, max_age_days=7):
+        scores = {}
+        if not self.conn:
+            return scores
+        try:
+            cursor = self.conn.cursor()
+            for i in range(0, len(cve_ids), 500):
+                chunk = cve_ids[i:i+500]
+                cursor.execute(f'''
+                    SELECT cve_id, score, percentile, model_version, score_date
+                    FROM epss_cache
+                    WHERE cve_id IN ({','.join('?' * len(chunk))})
+                    AND datetime(cached_at) > datetime('now', ? || ' days')
+                ''', (*chunk, -max_age_days))
+                for row in cursor.fetchall():
+                    scores[row[0]] = row[1:]
+        except Exception:
+            pass
+        return scores
+
     def cache_epss_score(self, cve_id, score, percentile, model_version, score_date):
         if not self.conn:
             return
@@ -193,6 +220,20 @@ class EPSSCacheDB:
         except Exception:
             pass
 
+    def cache_epss_scores_bulk(self, scores):
+        if not self.conn or not scores:
+            return
+        try:
+            with self.conn:  # commits, or rolls back if any row fails
+                self.conn.executemany('''
+                    INSERT OR REPLACE INTO epss_cache
+                    (cve_id, score, percentile, model_version, score_date)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', [(s['cve_id'], s['epss'], s['percentile'],
+                       s.get('model_version', ''), s.get('score_date', '')) for s in scores])
+        except Exception:
+            pass
+
     def get_all_cisa_kev_cves(self, max_age_days=1):
         if not self.conn:
             return None
@@ -224,6 +265,66 @@ class EPSSCacheDB:
         except Exception:
             pass
 
+    def cache_cisa_kev_bulk(self, entries):
+        if not self.conn or not entries:
+            return
+        try:
+            with self.conn:  # commits, or rolls back if any row fails
+                for i in range(0, len(entries), 500):
+                    self.conn.executemany('''
+                        INSERT OR REPLACE INTO cisa_kev_cache
+                        (cve_id, vendor_project, product, vulnerability_name,
+                         date_added, short_description, required_action, due_date)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', entries[i:i+500])
+        except Exception:
+            pass
+
+    def get_kev_conditional_headers(self):
+        # Only worth asking for a 304 when there are cached rows to fall back on
+        headers = {}
+        if not self.conn:
+            return headers
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute("SELECT 1 FROM cisa_kev_cache LIMIT 1")
+            if cursor.fetchone() is None:
+                return headers
+            cursor.execute('''
+                SELECT key, value FROM metadata
+                WHERE key IN ('kev_etag', 'kev_last_modified')
+            ''')
+            validators = dict(cursor.fetchall())
+            if validators.get('kev_etag'):
+                headers['If-None-Match'] = validators['kev_etag']
+            if validators.get('kev_last_modified'):
+                headers['If-Modified-Since'] = validators['kev_last_modified']
+        except Exception:
+            return {}
+        return headers
+
+    def set_kev_validators(self, etag, last_modified):
+        if not self.conn:
+            return
+        try:
+            with self.conn:
+                self.conn.executemany('''
+                    INSERT OR REPLACE INTO metadata (key, value, updated_at)
+                    VALUES (?, ?, CURRENT_TIMESTAMP)
+                ''', [('kev_etag', etag or ''), ('kev_last_modified', last_modified or '')])
+        except Exception:
+            pass
+
+    def refresh_cisa_kev_cache(self):
+        if not self.conn:
+            return 0
+        try:
+            with self.conn:
+                cursor = self.conn.execute("UPDATE cisa_kev_cache SET cached_at = CURRENT_TIMESTAMP")
+            return cursor.rowcount
+        except Exception:
+            return 0
+
     def log_api_call(self, api_type, url, params, status_code, response_time, from_cache=False):
         if not self.conn:
             return
@@ -265,9 +366,13 @@ class EPSSCacheDB:
             pass
         return stats
 
-    def __del__(self):
+    def close(self):
         if self.conn:
             self.conn.close()
+            self.conn = None
+
+    def __del__(self):
+        self.close()
 
 
 # ── Scanner registry ──────────────────────────────────────────────────────
@@ -331,6 +436,7 @@ class VulnerabilityPrioritizer:
             cache_max_age_days=self.config.get("cache_settings", {}).get("epss_cache_days", 7),
             timeout=self.config.get("api_settings", {}).get("timeout", 10),
             rate_limit_delay=self.config.get("api_settings", {}).get("rate_limit_delay", 1.0),
+            max_workers=self.config.get("api_settings", {}).get("max_workers", 4),
         )
         self._kev_provider = CISAKEVProvider(
             api_url=self.config.get("api_settings", {}).get("cisa_kev_api",
@@ -380,7 +486,8 @@ class VulnerabilityPrioritizer:
             "api_settings": {
                 "epss_api": "https://api.first.org/data/v1/epss",
                 "cisa_kev_api": "https://www.cisa.gov/sites/default/files/feeds/known_exploited_vulnerabilities.json",
-                "timeout": 10, "max_retries": 3, "rate_limit_delay": 1.0
+                "timeout": 10, "max_retries": 3, "rate_limit_delay": 1.0,
+                "max_workers": 4
             },
             "cache_settings": {"epss_cache_days": 7, "kev_cache_days": 1},
             "critical_override_conditions": {
@@ -497,22 +604,23 @@ class VulnerabilityPrioritizer:
         uncached_cves = []
 
         if self.db:
-            cache_hits = 0
+            cached_scores = self.db.get_epss_scores_bulk(
+                cve_ids,
+                max_age_days=self.config['cache_settings']['epss_cache_days']
+            )
             for cve in cve_ids:
-                cached = self.db.get_epss_score(
-                    cve,
-                    max_age_days=self.config['cache_settings']['epss_cache_days']
-                )
+                cached = cached_scores.get(cve)
                 if cached:
+                    score, percentile, model_version, score_date = cached
                     epss_data[cve] = {
-                        'epss': cached['score'],
-                        'percentile': cached['percentile'],
-                        'model_version': cached['model_version'],
-                        'score_date': cached['score_date']
+                        'epss': score,
+                        'percentile': percentile,
+                        'model_version': model_version,
+                        'score_date': score_date
                     }
-                    cache_hits += 1
                 else:
                     uncached_cves.append(cve)
+            cache_hits = len(cve_ids) - len(uncached_cves)
 
             if cache_hits > 0:
                 print(f"[CACHE] Found {cache_hits}/{len(cve_ids)} CVEs in cache")
@@ -524,49 +632,31 @@ class VulnerabilityPrioritizer:
 
         print(f"[API] Fetching {len(uncached_cves)} CVEs from EPSS API...")
         success_count = 0
-        batch_size = 50
-
-        for i in range(0, len(uncached_cves), batch_size):
-            batch = uncached_cves[i:i+batch_size]
-            cve_param = ','.join(batch)
-
-            try:
-                headers = {'User-Agent': 'VulnPrioritizer/2.0', 'Accept': 'application/json'}
-                response = requests.get(
-                    self.config['api_settings']['epss_api'],
-                    params={'cve': cve_param},
-                    headers=headers,
-                    timeout=self.config['api_settings']['timeout']
-                )
-
-                if self.db:
+        # One request per batch; 150 CVE IDs keeps the query string near 2KB
+        batch_size = 150
+        batches = [uncached_cves[i:i+batch_size] for i in range(0, len(uncached_cves), batch_size)]
+        max_workers = min(self.config['api_settings'].get('max_workers', 4), len(batches))
+        delay = self.config['api_settings']['rate_limit_delay']
+
+        # Batches download concurrently; this thread is the only one touching the
+        # cache connection and writes each batch as it completes.
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                # A worker's first request goes out at once, later ones keep the delay
+                executor.submit(self._fetch_epss_batch, batch,
+                                delay if i >= max_workers else 0.0): batch
+                for i, batch in enumerate(batches)
+            }
+            for future in as_completed(futures):
+                status_code, batch_data = future.result()
+                if self.db and status_code is not None:
                     self.db.log_api_call("EPSS", self.config['api_settings']['epss_api'],
-                                        {'cve_count': len(batch)}, response.status_code, 0, False)
-
-                if response.status_code == 200:
-                    data = response.json()
-                    for item in data.get('data', []):
-                        cve = item.get('cve', '')
-                        if cve:
-                            epss_data[cve] = {
-                                'epss': float(item.get('epss', 0)),
-                                'percentile': float(item.get('percentile', 0)),
-                                'model_version': data.get('model_version', ''),
-                                'score_date': data.get('score_date', '')
-                            }
-                            success_count += 1
-                            if self.db:
-                                self.db.cache_epss_score(
-                                    cve, epss_data[cve]['epss'], epss_data[cve]['percentile'],
-                                    epss_data[cve]['model_version'], epss_data[cve]['score_date']
-                                )
-                else:
-                    print(f"[ERROR] EPSS API returned status {response.status_code}")
-
-            except Exception as e:
-                print(f"[ERROR] Error fetching EPSS batch: {e}")
-
-            time.sleep(self.config['api_settings']['rate_limit_delay'])
+                                        {'cve_count': len(futures[future])}, status_code, 0, False)
+                epss_data.update(batch_data)
+                success_count += len(batch_data)
+                if self.db:
+                    self.db.cache_epss_scores_bulk(
+                        [dict(entry, cve_id=cve) for cve, entry in batch_data.items()])
 
         print(f"[INFO] Successfully fetched EPSS for {success_count}/{len(uncached_cves)} CVEs from API")
 
@@ -576,6 +666,36 @@ class VulnerabilityPrioritizer:
                                   'model_version': '', 'score_date': ''}
         return epss_data
 
+    def _fetch_epss_batch(self, batch: List[str], delay: float):
+        """Fetch one batch of EPSS scores; returns (status_code, scores by CVE)."""
+        time.sleep(delay)
+        batch_data = {}
+        try:
+            headers = {'User-Agent': 'VulnPrioritizer/2.0', 'Accept': 'application/json'}
+            response = SESSION.get(
+                self.config['api_settings']['epss_api'],
+                params={'cve': ','.join(batch)},
+                headers=headers,
+                timeout=self.config['api_settings']['timeout']
+            )
+            if response.status_code == 200:
+                data = response.json()
+                for item in data.get('data', []):
+                    cve = item.get('cve', '')
+                    if cve:
+                        batch_data[cve] = {
+                            'epss': float(item.get('epss', 0)),
+                            'percentile': float(item.get('percentile', 0)),
+                            'model_version': data.get('model_version', ''),
+                            'score_date': data.get('score_date', '')
+                        }
+            else:
+                print(f"[ERROR] EPSS API returned status {response.status_code}")
+            return response.status_code, batch_data
+        except Exception as e:
+            print(f"[ERROR] Error fetching EPSS batch: {e}")
+            return None, batch_data
+
     def fetch_cisa_kev(self) -> set:
         if self.cisa_kev_cache:
             return self.cisa_kev_cache
@@ -590,30 +710,49 @@ class VulnerabilityPrioritizer:
                 return self.cisa_kev_cache
 
         print("[INFO] Fetching CISA KEV catalog...")
+        headers = {'User-Agent': 'VulnPrioritizer/2.0'}
+        if self.db:
+            headers.update(self.db.get_kev_conditional_headers())
         try:
-            response = requests.get(
+            with SESSION.get(
                 self.config['api_settings']['cisa_kev_api'],
-                headers={'User-Agent': 'VulnPrioritizer/2.0'},
-                timeout=self.config['api_settings']['timeout']
-            )
-            if response.status_code == 200:
-                data = response.json()
-                for vuln in data.get('vulnerabilities', []):
-                    cve_id = vuln.get('cveID', '')
-                    if cve_id:
-                        self.cisa_kev_cache.add(cve_id)
-                        if self.db:
-                            self.db.cache_cisa_kev(
+                headers=headers,
+                timeout=self.config['api_settings']['timeout'],
+                stream=True
+            ) as response:
+                if response.status_code == 304:
+                    self.db.refresh_cisa_kev_cache()
+                    self.cisa_kev_cache = self.db.get_all_cisa_kev_cves(
+                        max_age_days=self.config['cache_settings']['kev_cache_days']
+                    ) or set()
+                    print(f"[CACHE] CISA KEV not modified, reusing {len(self.cisa_kev_cache)} cached CVEs")
+                elif response.status_code == 200:
+                    kev_set = set()
+                    kev_rows = []
+                    for vuln in iter_kev_entries(response):
+                        cve_id = vuln.get('cveID', '')
+                        if cve_id:
+                            kev_set.add(cve_id)
+                            kev_rows.append((
                                 cve_id, vuln.get('vendorProject', ''), vuln.get('product', ''),
                                 vuln.get('vulnerabilityName', ''), vuln.get('dateAdded', ''),
                                 vuln.get('shortDescription', ''), vuln.get('requiredAction', ''),
                                 vuln.get('dueDate', '')
-                            )
-                print(f"[INFO] Loaded {len(self.cisa_kev_cache)} CVEs from CISA KEV")
-            else:
-                print(f"[ERROR] Failed to fetch CISA KEV: {response.status_code}")
+                            ))
+                    # Cache only a complete feed, and only once it is off the wire,
+                    # so no write transaction is held open across the download
+                    if self.db:
+                        self.db.cache_cisa_kev_bulk(kev_rows)
+                    self.cisa_kev_cache = kev_set
+                    if self.db:
+                        self.db.set_kev_validators(response.headers.get('ETag'),
+                                                   response.headers.get('Last-Modified'))
+                    print(f"[INFO] Loaded {len(self.cisa_kev_cache)} CVEs from CISA KEV")
+                else:
+                    print(f"[ERROR] Failed to fetch CISA KEV: {response.status_code}")
         except Exception as e:
             print(f"[ERROR] Error fetching CISA KEV: {e}")
+            self.cisa_kev_cache = set()
 
         return self.cisa_kev_cache
 